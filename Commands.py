@@ -1,6 +1,5 @@
 import importlib
 import os
-from inspect import signature, Parameter
 from Config.Agent import Agent
 
 
@@ -79,14 +78,7 @@ class Commands:
         return commands
 
     def get_command_params(self, func):
-        params = {}
-        sig = signature(func)
-        for name, param in sig.parameters.items():
-            if param.default == Parameter.empty:
-                params[name] = None
-            else:
-                params[name] = param.default
-        return params
+        return self.CFG.get_command_params(func)
 
     def find_command(self, command_name: str):
         for name, module, function_name, params in self.commands:
@@ -1,29 +1,89 @@
 import os
 import json
-import glob
 import uuid
 import shutil
 import importlib
-import yaml
+import functools
 from pathlib import Path
-from dotenv import load_dotenv
 from inspect import signature, Parameter
-from provider import Provider
 from Config import Config
 
-load_dotenv()
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(data):
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+# Memory flags are read once, Config has already loaded .env by this point
+NO_MEMORY = os.getenv("NO_MEMORY", "false").lower() == "true"
+USE_LONG_TERM_MEMORY_ONLY = (
+    os.getenv("USE_LONG_TERM_MEMORY_ONLY", "false").lower() == "true"
+)
+
+# Raw config.json bytes keyed by path, with the mtime and size they were read at
+_CONFIG_CACHE = {}
+
+# Commands discovered in commands/, with the directory mtime they were scanned at
+_COMMANDS_CACHE = {}
+
+# Command parameter defaults keyed by function, since signature() is slow to build
+_COMMAND_PARAMS_CACHE = {}
 
 
 class Agent(Config):
+    # Agents are created per request, so skip the per-instance __dict__
+    __slots__ = (
+        "AGENT_NAME",
+        "_agents_root",
+        "_agent_dir",
+        "_agent_file",
+        "_config_json",
+        "AGENT_CONFIG",
+        "PROVIDER_SETTINGS",
+        "AI_PROVIDER",
+        "PROVIDER",
+        "instruct",
+        "AI_MODEL",
+        "AI_TEMPERATURE",
+        "MAX_TOKENS",
+        "EXECUTION_PROMPT",
+        "TASK_PROMPT",
+        "PRIORITY_PROMPT",
+        "INSTRUCT_PROMPT",
+        "NO_MEMORY",
+        "USE_LONG_TERM_MEMORY_ONLY",
+        "memory_file",
+        "memory",
+        "agent_instances",
+        "commands",
+    )
+
+    # Model prompt bundles keyed by AI_MODEL, shared by every agent using that model
+    _PROMPT_CACHE = {}
+
     def __init__(self, agent_name=None):
         # General Configuration
         self.AGENT_NAME = agent_name if agent_name is not None else "AgentLLM"
+        # Resolve agent paths once, os.path.abspath calls os.getcwd() every time
+        self._agents_root = os.path.abspath("agents")
+        self._agent_dir = os.path.join(self._agents_root, self.AGENT_NAME)
+        self._agent_file = f"{self._agent_dir}.jsonl"
+        self._config_json = os.path.join(self._agent_dir, "config.json")
         # Need to get the following from the agent config file:
         self.AGENT_CONFIG = self.get_agent_config()
         # AI Configuration
         if "settings" in self.AGENT_CONFIG:
             self.PROVIDER_SETTINGS = self.AGENT_CONFIG["settings"]
             if "provider" in self.PROVIDER_SETTINGS:
+                from provider import Provider
+
                 self.AI_PROVIDER = self.PROVIDER_SETTINGS["provider"]
                 self.PROVIDER = Provider(self.AI_PROVIDER, **self.PROVIDER_SETTINGS)
                 self.instruct = self.PROVIDER.instruct
@@ -32,25 +92,19 @@ class Agent(Config):
                 self.AI_MODEL = self.PROVIDER_SETTINGS["AI_MODEL"]
             else:
                 self.AI_MODEL = "openassistant"
-            if not os.path.exists(f"model-prompts/{self.AI_MODEL}"):
-                self.AI_MODEL = "default"
-            with open(f"model-prompts/{self.AI_MODEL}/execute.txt", "r") as f:
-                self.EXECUTION_PROMPT = f.read()
-            with open(f"model-prompts/{self.AI_MODEL}/task.txt", "r") as f:
-                self.TASK_PROMPT = f.read()
-            with open(f"model-prompts/{self.AI_MODEL}/priority.txt", "r") as f:
-                self.PRIORITY_PROMPT = f.read()
-            with open(f"model-prompts/{self.AI_MODEL}/instruct.txt", "r") as f:
-                self.INSTRUCT_PROMPT = f.read()
+            self.AI_MODEL = self._resolve_prompt_dir(self.AI_MODEL).name
+            prompts = self._load_prompts(self.AI_MODEL)
+            self.EXECUTION_PROMPT = prompts["execute"]
+            self.TASK_PROMPT = prompts["task"]
+            self.PRIORITY_PROMPT = prompts["priority"]
+            self.INSTRUCT_PROMPT = prompts["instruct"]
 
         # Memory Settings
-        self.NO_MEMORY = os.getenv("NO_MEMORY", "false").lower()
-        self.USE_LONG_TERM_MEMORY_ONLY = os.getenv(
-            "USE_LONG_TERM_MEMORY_ONLY", "false"
-        ).lower()
+        self.NO_MEMORY = NO_MEMORY
+        self.USE_LONG_TERM_MEMORY_ONLY = USE_LONG_TERM_MEMORY_ONLY
 
-        # Yaml Memory
-        self.memory_file = f"agents/{self.AGENT_NAME}.yaml"
+        # JSONL Memory
+        self.memory_file = self._agent_file
         self._create_parent_directories(self.memory_file)
         self.memory = self.load_memory()
         self.agent_instances = {}
@@ -61,6 +115,24 @@ class Agent(Config):
             if key in self.AGENT_CONFIG:
                 setattr(self, key, self.AGENT_CONFIG[key])
 
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _resolve_prompt_dir(model):
+        prompt_dir = Path("model-prompts") / model
+        if not prompt_dir.exists():
+            prompt_dir = Path("model-prompts") / "default"
+        return prompt_dir
+
+    def _load_prompts(self, model):
+        if model not in Agent._PROMPT_CACHE:
+            prompt_dir = self._resolve_prompt_dir(model)
+            prompts = {}
+            for prompt_name in ("execute", "task", "priority", "instruct"):
+                prompt_file = prompt_dir / f"{prompt_name}.txt"
+                prompts[prompt_name] = prompt_file.read_bytes().decode("utf-8")
+            Agent._PROMPT_CACHE[model] = prompts
+        return Agent._PROMPT_CACHE[model]
+
     def _create_parent_directories(self, file_path):
         path = Path(file_path)
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -74,172 +146,183 @@ class Agent(Config):
 
     def create_agent_folder(self, agent_name):
         agent_folder = f"agents/{agent_name}"
-        if not os.path.exists("agents"):
-            os.makedirs("agents")
-        if not os.path.exists(agent_folder):
-            os.makedirs(agent_folder)
+        os.makedirs(agent_folder, exist_ok=True)
         return agent_folder
 
     def get_command_params(self, func):
-        params = {}
-        sig = signature(func)
-        for name, param in sig.parameters.items():
-            if param.default == Parameter.empty:
-                params[name] = None
-            else:
-                params[name] = param.default
-        return params
+        # Bound methods are recreated with every command instance, so key on the function
+        cache_key = (getattr(func, "__func__", func), hasattr(func, "__self__"))
+        if cache_key not in _COMMAND_PARAMS_CACHE:
+            params = {}
+            sig = signature(func)
+            for name, param in sig.parameters.items():
+                if param.default == Parameter.empty:
+                    params[name] = None
+                else:
+                    params[name] = param.default
+            _COMMAND_PARAMS_CACHE[cache_key] = params
+        return dict(_COMMAND_PARAMS_CACHE[cache_key])
 
     def load_commands(self):
+        commands_mtime = os.stat("commands").st_mtime_ns
+        if _COMMANDS_CACHE.get("mtime") == commands_mtime:
+            return list(_COMMANDS_CACHE["commands"])
         commands = []
-        command_files = glob.glob("commands/*.py")
+        with os.scandir("commands") as entries:
+            command_files = [
+                entry.name
+                for entry in entries
+                if entry.name.endswith(".py") and entry.is_file()
+            ]
         for command_file in command_files:
-            module_name = os.path.splitext(os.path.basename(command_file))[0]
+            module_name = command_file[:-3]
             module = importlib.import_module(f"commands.{module_name}")
             command_class = getattr(module, module_name.lower())()
             if hasattr(command_class, "commands"):
                 for command_name, command_function in command_class.commands.items():
                     params = self.get_command_params(command_function)
                     commands.append((command_name, command_function.__name__, params))
-        return commands
+        _COMMANDS_CACHE["mtime"] = commands_mtime
+        _COMMANDS_CACHE["commands"] = commands
+        _COMMANDS_CACHE["command_dict"] = {
+            command_name: False for command_name, _, _ in commands
+        }
+        return list(commands)
+
+    def _default_command_dict(self):
+        # Every known command disabled, rebuilt only when load_commands rescans
+        self.load_commands()
+        return dict(_COMMANDS_CACHE["command_dict"])
 
     def load_command_files(self):
-        command_files = glob.glob("commands/*.py")
+        with os.scandir("commands") as entries:
+            command_files = [
+                entry.path
+                for entry in entries
+                if entry.name.endswith(".py") and entry.is_file()
+            ]
         return command_files
 
     def create_agent_config_file(self, agent_name, provider_settings, commands):
         agent_dir = os.path.join("agents", agent_name)
         agent_config_file = os.path.join(agent_dir, "config.json")
-        settings = json.dumps(
-            {
-                "commands": commands,
-                "settings": provider_settings,
-            }
-        )
 
         # Check and create agent directory if it doesn't exist
-        if not os.path.exists(agent_dir):
-            os.makedirs(agent_dir)
+        os.makedirs(agent_dir, exist_ok=True)
 
         # Write the settings to the agent config file
-        with open(agent_config_file, "w") as f:
-            f.write(settings)
+        self.write_agent_config(
+            agent_config_file,
+            {
+                "commands": commands,
+                "settings": provider_settings,
+            },
+        )
 
         return agent_config_file
 
+    def _read_config_file(self, config_file):
+        # Expects a path under _agents_root so each file has a single cache entry
+        stat = os.stat(config_file)
+        cached = _CONFIG_CACHE.get(config_file)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            with open(config_file, "rb") as f:
+                cached = (stat.st_mtime_ns, stat.st_size, f.read())
+            _CONFIG_CACHE[config_file] = cached
+        # Parsing the cached bytes gives every caller its own dict to mutate
+        return _json_loads(cached[2])
+
     def load_agent_config(self, agent_name):
+        agent_config_file = os.path.join(self._agents_root, agent_name, "config.json")
         try:
-            with open(
-                os.path.join("agents", agent_name, "config.json")
-            ) as agent_config:
-                try:
-                    agent_config_data = json.load(agent_config)
-                    return agent_config_data
-                except json.JSONDecodeError:
-                    agent_config_data = {}
-                    # Populate the agent_config with all commands enabled
-                    agent_config_data["commands"] = {
-                        command_name: "false"
-                        for command_name, _, _ in self.load_commands(agent_name)
-                    }
-                    agent_config_data["settings"] = {
-                        "provider": "huggingchat",
-                        "AI_MODEL": "openassistant",
-                        "AI_TEMPERATURE": 0.4,
-                        "MAX_TOKENS": 2000,
-                    }
-                    # Save the updated agent_config to the file
-                    with open(
-                        os.path.join("agents", agent_name, "config.json"), "w"
-                    ) as agent_config_file:
-                        json.dump(agent_config_data, agent_config_file)
-                    return agent_config_data
+            agent_config_data = self._read_config_file(agent_config_file)
+            return agent_config_data
+        except json.JSONDecodeError:
+            agent_config_data = {}
+            # Populate the agent_config with all commands enabled
+            agent_config_data["commands"] = self._default_command_dict()
+            agent_config_data["settings"] = {
+                "provider": "huggingchat",
+                "AI_MODEL": "openassistant",
+                "AI_TEMPERATURE": 0.4,
+                "MAX_TOKENS": 2000,
+            }
+            # Save the updated agent_config to the file
+            self.write_agent_config(agent_config_file, agent_config_data)
+            return agent_config_data
         except:
             # Add all commands to agent/{agent_name}/config.json in this format {"command_name": "false"}
-            agent_config_file = os.path.join("agents", agent_name, "config.json")
-            with open(agent_config_file, "w") as f:
-                f.write(
-                    json.dumps(
-                        {
-                            "commands": {
-                                command_name: "false"
-                                for command_name, _, _ in self.load_commands()
-                            },
-                            "settings": {
-                                "provider": "huggingchat",
-                                "AI_MODEL": "openassistant",
-                                "AI_TEMPERATURE": 0.4,
-                                "MAX_TOKENS": 2000,
-                            },
-                        }
-                    )
-                )
+            agent_config_data = {
+                "commands": self._default_command_dict(),
+                "settings": {
+                    "provider": "huggingchat",
+                    "AI_MODEL": "openassistant",
+                    "AI_TEMPERATURE": 0.4,
+                    "MAX_TOKENS": 2000,
+                },
+            }
+            self.write_agent_config(agent_config_file, agent_config_data)
         return agent_config_data
 
     def write_agent_config(self, agent_config, config_data):
-        with open(agent_config, "w") as f:
-            json.dump(config_data, f)
+        # Write a temporary file and swap it in so readers never see a partial config.
+        # Each writer gets its own temporary file so concurrent writes cannot collide,
+        # and open() rather than mkstemp() keeps the usual umask-based file mode.
+        temp_file = f"{agent_config}.{uuid.uuid4().hex}.tmp"
+        f = open(temp_file, "xb")
+        try:
+            with f:
+                f.write(_json_dumps(config_data))
+            os.replace(temp_file, agent_config)
+        except BaseException:
+            os.unlink(temp_file)
+            raise
 
     def add_agent(self, agent_name, provider_settings):
         agent_folder = self.create_agent_folder(agent_name)
 
-        commands_list = self.load_commands()
-        command_dict = {}
-        for command in commands_list:
-            friendly_name, command_name, command_args = command
-            command_dict[friendly_name] = False
+        command_dict = self._default_command_dict()
         agent_config = self.create_agent_config_file(
             agent_name, provider_settings, command_dict
         )
         # self.write_agent_config(agent_config, {"commands": command_dict})
-        return {"agent_file": f"{agent_name}.yaml"}
+        return {"agent_file": f"{agent_name}.jsonl"}
 
     def rename_agent(self, agent_name, new_name):
-        agent_file = f"agents/{agent_name}.yaml"
-        agent_folder = f"agents/{agent_name}/"
-        agent_file = os.path.abspath(agent_file)
-        agent_folder = os.path.abspath(agent_folder)
+        agent_file = os.path.join(self._agents_root, f"{agent_name}.jsonl")
+        agent_folder = os.path.join(self._agents_root, agent_name)
         if os.path.exists(agent_file):
-            os.rename(agent_file, os.path.join("agents", f"{new_name}.yaml"))
-        if os.path.exists(agent_folder):
-            os.rename(agent_folder, os.path.join("agents", f"{new_name}"))
+            os.rename(agent_file, os.path.join(self._agents_root, f"{new_name}.jsonl"))
+        if os.path.isdir(agent_folder):
+            os.rename(agent_folder, os.path.join(self._agents_root, new_name))
 
     def delete_agent(self, agent_name):
-        agent_file = f"agents/{agent_name}.yaml"
-        agent_folder = f"agents/{agent_name}/"
-        agent_file = os.path.abspath(agent_file)
-        agent_folder = os.path.abspath(agent_folder)
+        agent_file = os.path.join(self._agents_root, f"{agent_name}.jsonl")
+        agent_folder = os.path.join(self._agents_root, agent_name)
         try:
-            os.remove(agent_file)
+            os.unlink(agent_file)
         except FileNotFoundError:
             return {"message": f"Agent file {agent_file} not found."}, 404
 
-        if os.path.exists(agent_folder):
-            shutil.rmtree(agent_folder)
+        shutil.rmtree(agent_folder, ignore_errors=True)
 
         return {"message": f"Agent {agent_name} deleted."}, 200
 
     def get_agent_config(self):
-        while True:
-            agent_file = os.path.abspath(f"agents/{self.AGENT_NAME}/config.json")
-            if os.path.exists(agent_file):
-                with open(agent_file, "r") as f:
-                    file_content = f.read().strip()
-                    if file_content:
-                        agent_config = json.loads(file_content)
-                        break
-                    else:
-                        self.add_agent(self.AGENT_NAME, {})
-            else:
-                self.add_agent(self.AGENT_NAME, {})
-        return agent_config
+        agent_file = self._config_json
+        try:
+            return self._read_config_file(agent_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Create a missing or unreadable config once instead of retrying indefinitely
+            self.add_agent(self.AGENT_NAME, {})
+            return self._read_config_file(agent_file)
 
     def update_agent_config(self, new_config):
         agent_name = self.AGENT_NAME
         agent_config_file = os.path.join("agents", agent_name, "config.json")
         if os.path.exists(agent_config_file):
-            with open(agent_config_file, "r") as f:
-                current_config = json.load(f)
+            with open(agent_config_file, "rb") as f:
+                current_config = _json_loads(f.read())
 
             # Ensure the "settings" key is present in the current configuration
             if "settings" not in current_config:
@@ -249,44 +332,76 @@ class Agent(Config):
             current_config["settings"].update(new_config)
 
             # Save the updated configuration back to the file
-            with open(agent_config_file, "w") as f:
-                json.dump(current_config, f)
+            self.write_agent_config(agent_config_file, current_config)
 
             return f"Agent {agent_name} configuration updated."
         else:
             return f"Agent {agent_name} configuration not found."
 
-    def get_chat_history(self, agent_name):
-        if not os.path.exists(os.path.join("agents", f"{agent_name}.yaml")):
+    def get_chat_history(self, agent_name=None):
+        if agent_name is None:
+            chat_history_file = self._agent_file
+        else:
+            chat_history_file = os.path.join(self._agents_root, f"{agent_name}.jsonl")
+        try:
+            with open(chat_history_file, "rb") as f:
+                return f.read().decode("utf-8", "replace")
+        except FileNotFoundError:
             return ""
-        with open(os.path.join("agents", f"{agent_name}.yaml"), "r") as f:
-            chat_history = f.read()
-        return chat_history
 
     def wipe_agent_memories(self, agent_name):
-        agent_folder = f"agents/{agent_name}/"
-        agent_folder = os.path.abspath(agent_folder)
+        agent_folder = os.path.join(self._agents_root, agent_name)
         memories_folder = os.path.join(agent_folder, "memories")
-        if os.path.exists(memories_folder):
+        if os.path.isdir(memories_folder):
             shutil.rmtree(memories_folder)
 
     def load_memory(self):
+        interactions = []
         if os.path.exists(self.memory_file):
-            with open(self.memory_file, "r") as file:
-                memory = yaml.safe_load(file)
-        else:
-            with open(self.memory_file, "w") as file:
-                yaml.safe_dump({"interactions": []}, file)
-            memory = {"interactions": []}
-        return memory
+            needs_rewrite = False
+            with open(self.memory_file, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    try:
+                        interactions.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Most likely an append cut short by a crash
+                        print(f"Skipping unreadable line in {self.memory_file}")
+                        needs_rewrite = True
+                    # The next append would be glued onto a line without a newline
+                    if not line.endswith("\n"):
+                        needs_rewrite = True
+            self.memory = {"interactions": interactions}
+            if needs_rewrite:
+                self.save_memory()
+            return self.memory
+        # Convert the legacy YAML memory file to JSONL once
+        legacy_file = os.path.splitext(self.memory_file)[0] + ".yaml"
+        if os.path.exists(legacy_file):
+            import yaml
+
+            # Prefer the libyaml-backed loader when PyYAML was built with it
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            with open(legacy_file, "r") as file:
+                legacy_memory = yaml.load(file, Loader=loader) or {}
+            interactions = legacy_memory.get("interactions") or []
+        self.memory = {"interactions": interactions}
+        self.save_memory()
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+        return self.memory
 
     def save_memory(self):
-        with open(self.memory_file, "w") as file:
-            yaml.safe_dump(self.memory, file)
+        with open(self.memory_file, "w", encoding="utf-8") as file:
+            for interaction in self.memory["interactions"]:
+                file.write(json.dumps(interaction) + "\n")
 
     def log_interaction(self, role: str, message: str):
-        self.memory["interactions"].append({"role": role, "message": message})
-        self.save_memory()
+        interaction = {"role": role, "message": message}
+        self.memory["interactions"].append(interaction)
+        with open(self.memory_file, "a", encoding="utf-8") as file:
+            file.write(json.dumps(interaction) + "\n")
 
     def get_task_output(self, agent_name, primary_objective=None):
         if primary_objective is None:
@@ -302,20 +417,13 @@ class Agent(Config):
         return task_output
 
     def save_task_output(self, agent_name, task_output, primary_objective=None):
-        # Check if agents/{agent_name}/tasks/task_name.txt exists
-        # If it does, append to it
-        # If it doesn't, create it
-        if "tasks" not in os.listdir(os.path.join("agents", agent_name)):
-            os.makedirs(os.path.join("agents", agent_name, "tasks"))
+        # Append to agents/{agent_name}/tasks/{primary_objective}.txt
+        os.makedirs(os.path.join(self._agents_root, agent_name, "tasks"), exist_ok=True)
         if primary_objective is None:
             primary_objective = str(uuid.uuid4())
         task_output_file = os.path.join(
-            "agents", agent_name, "tasks", f"{primary_objective}.txt"
+            self._agents_root, agent_name, "tasks", f"{primary_objective}.txt"
         )
-        with open(
-            task_output_file,
-            "a" if os.path.exists(task_output_file) else "w",
-            encoding="utf-8",
-        ) as f:
-            f.write(task_output)
+        with open(task_output_file, "ab") as f:
+            f.write(task_output.encode("utf-8"))
         return task_output
@@ -6,6 +6,32 @@ load_dotenv()
 
 
 class Config:
+    __slots__ = (
+        "WORKING_DIRECTORY",
+        "OPENAI_API_KEY",
+        "BARD_TOKEN",
+        "HUGGINGFACE_API_KEY",
+        "HUGGINGFACE_AUDIO_TO_TEXT_MODEL",
+        "SELENIUM_WEB_BROWSER",
+        "TW_CONSUMER_KEY",
+        "TW_CONSUMER_SECRET",
+        "TW_ACCESS_TOKEN",
+        "TW_ACCESS_TOKEN_SECRET",
+        "GITHUB_API_KEY",
+        "GITHUB_USERNAME",
+        "SENDGRID_API_KEY",
+        "SENDGRID_EMAIL",
+        "MICROSOFT_365_CLIENT_ID",
+        "MICROSOFT_365_CLIENT_SECRET",
+        "MICROSOFT_365_REDIRECT_URI",
+        "SEARXNG_INSTANCE_URL",
+        "DISCORD_API_KEY",
+        "ELEVENLABS_API_KEY",
+        "ELEVENLABS_VOICE",
+        "USE_MAC_OS_TTS",
+        "USE_BRIAN_TTS",
+    )
+
     def __init__(self):
         self.WORKING_DIRECTORY = os.getenv("WORKING_DIRECTORY", "WORKSPACE")
         self._create_directory_if_not_exists(self.WORKING_DIRECTORY)
@@ -64,8 +90,7 @@ class Config:
         self.USE_BRIAN_TTS = os.getenv("USE_BRIAN_TTS", "true").lower()
 
     def _create_directory_if_not_exists(self, directory):
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
 
     def get_providers(self):
         providers = []
@@ -76,12 +101,13 @@ class Config:
 
     def get_agents(self):
         memories_dir = "agents"
-        if not os.path.exists(memories_dir):
-            os.makedirs(memories_dir)
+        os.makedirs(memories_dir, exist_ok=True)
         agents = []
         for file in os.listdir(memories_dir):
-            if file.endswith(".yaml"):
-                agents.append(file.replace(".yaml", ""))
+            agent_name, extension = os.path.splitext(file)
+            # Agents not yet migrated may still have a legacy .yaml memory file
+            if extension in (".jsonl", ".yaml") and agent_name not in agents:
+                agents.append(agent_name)
         output = []
         if agents:
             for agent in agents:
@@ -4,8 +4,7 @@ import os
 class CustomPrompt:
     def add_prompt(self, prompt_name, prompt):
         # if prompts folder does not exist, create it
-        if not os.path.exists("prompts"):
-            os.mkdir("prompts")
+        os.makedirs("prompts", exist_ok=True)
         # if prompt file does not exist, create it
         if not os.path.exists(os.path.join("prompts", f"{prompt_name}.txt")):
             with open(os.path.join("prompts", f"{prompt_name}.txt"), "w") as f: